@@ -1,25 +1,149 @@
-import os
+import pathlib
+
+import numpy as np
 import pandas as pd
 import streamlit as st
-import plotly.express as px
 
-# Automatically change the working directory to the script's directory
-os.chdir(os.path.dirname(__file__))
+# Copy-on-Write avoids defensive copies on pandas 2.x; it is always on from 3.0
+# and the option is slated for removal, so only set it where it still matters.
+if pd.__version__.startswith("2."):
+    pd.set_option("mode.copy_on_write", True)
+
+# Resolve data and asset paths relative to this script, wherever it is run from
+BASE_DIR = pathlib.Path(__file__).resolve().parent
 
 # Set page configuration
 st.set_page_config(page_title="CLEAR Dashboard", layout="wide")
 
+# Logo bitmaps decoded once per session instead of on every rerun
+@st.cache_resource
+def load_logo(path):
+    from PIL import Image
+    return Image.open(path)
+
+# Compact dtypes for the LCA catalog: float32 is plenty of precision for kg CO2
+CSV_DTYPES = {
+    "Product Name": "category",
+    "Raw Material (kg CO2)": "float32",
+    "Production (kg CO2)": "float32",
+    "Logistics (kg CO2)": "float32",
+    "Total Carbon Footprint (kg CO2)": "float32"
+}
+
+NUMERIC_COLS = [col for col in CSV_DTYPES if col != "Product Name"]
+
+# Give each numeric column its own contiguous array so column-wise math stays fast
+def ensure_columnar(df):
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = np.ascontiguousarray(df[col].to_numpy())
+    return df
+
+# CSV reader: use the multi-threaded pyarrow engine when available
+def read_csv_fast(source, **kwargs):
+    try:
+        return pd.read_csv(source, engine="pyarrow", **kwargs)
+    except ImportError:
+        return pd.read_csv(source, **kwargs)
+
 # Load dataset
 @st.cache_data
 def load_data(file_path):
     try:
-        return pd.read_csv(file_path)
+        return ensure_columnar(read_csv_fast(file_path, dtype=CSV_DTYPES))
     except FileNotFoundError:
         st.error(f"File not found: {file_path}")
         return pd.DataFrame()
 
-data_file = "sano_lca_products.csv"
+# Precomputed marker colors so Plotly skips per-row colorscale lookups
+@st.cache_data
+def bar_colors(values, colorscale="Blues"):
+    from plotly.colors import sample_colorscale
+
+    lo, hi = min(values), max(values)
+    span = (hi - lo) or 1.0
+    return sample_colorscale(colorscale, [(v - lo) / span for v in values])
+
+# Figure builders (cached so unchanged data skips Plotly figure construction)
+@st.cache_resource
+def build_env_figure(pie_items, bar_items):
+    import plotly.graph_objects as go
+    from plotly.colors import sequential
+    from plotly.subplots import make_subplots
+
+    categories, sums = zip(*pie_items)
+    names, totals = zip(*bar_items)
+    fig = make_subplots(
+        rows=1, cols=2,
+        specs=[[{"type": "domain"}, {"type": "xy"}]],
+        subplot_titles=("Emissions Distribution", "Total Emissions by Product")
+    )
+    fig.add_trace(go.Pie(labels=categories, values=sums, marker=dict(colors=sequential.RdBu)), 1, 1)
+    fig.add_trace(go.Bar(x=names, y=totals, marker=dict(color=bar_colors(totals)), showlegend=False), 1, 2)
+    fig.update_xaxes(title_text="Product", row=1, col=2)
+    fig.update_yaxes(title_text="Total Emissions (kg CO2)", row=1, col=2)
+    return fig
+
+@st.cache_resource
+def build_bar(items, title, x_label, y_label):
+    import plotly.graph_objects as go
+
+    names, values = zip(*items)
+    fig = go.Figure(go.Bar(
+        x=names,
+        y=values,
+        marker=dict(color=bar_colors(values))
+    ))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label)
+    return fig
+
+# Scenario adjustment (cached: only 6 distinct transport/energy combinations).
+# _data is excluded from hashing; source_token identifies the loaded dataset.
+@st.cache_data
+def compute_adjusted(_data, transport, energy, source_token):
+    multipliers = {
+        "Raw Material (kg CO2)": 1.0,
+        "Production (kg CO2)": 0.7 if energy == "Renewable" else 1.2,
+        "Logistics (kg CO2)": {"Air": 1.5, "Road": 1.0, "Sea": 0.8}[transport]
+    }
+
+    # Reuse the original column view whenever the multiplier is a no-op
+    def scaled(col):
+        arr = _data[col].to_numpy()
+        return arr * multipliers[col] if multipliers[col] != 1.0 else arr
+
+    raw = scaled("Raw Material (kg CO2)")
+    prod = scaled("Production (kg CO2)")
+    log = scaled("Logistics (kg CO2)")
+    adjusted = pd.DataFrame({
+        "Product Name": _data["Product Name"].values,
+        "Raw Material (kg CO2)": raw,
+        "Production (kg CO2)": prod,
+        "Logistics (kg CO2)": log,
+        "Total Carbon Footprint (kg CO2)": raw + prod + log
+    })
+    pie_summary = pd.DataFrame({
+        "Category": ["Raw Material (kg CO2)", "Production (kg CO2)", "Logistics (kg CO2)"],
+        "Emissions (kg CO2)": [raw.sum(), prod.sum(), log.sum()]
+    })
+    return adjusted, pie_summary
+
+# Financial projection (cached per carbon tax rate).
+# _data is excluded from hashing; source_token identifies the loaded dataset.
+@st.cache_data
+def compute_financial(_data, carbon_tax_rate, source_token):
+    tons = _data["Total Carbon Footprint (kg CO2)"].to_numpy() / 1000
+    tax = tons * carbon_tax_rate
+    # Under Copy-on-Write the Product Name column is shared with _data, not copied
+    financial = _data[["Product Name"]].assign(**{
+        "Total Carbon Footprint (tons)": tons,
+        "Carbon Tax (€)": tax
+    })
+    return financial, tons.sum(), tax.sum()
+
+data_file = str(BASE_DIR / "sano_lca_products.csv")
 data = load_data(data_file)
+data_token = data_file
 
 if data.empty:
     st.error("Dataset could not be loaded. Please ensure the CSV file is available.")
@@ -29,7 +153,7 @@ if data.empty:
 col_logo, col_title = st.columns([1, 4])
 with col_logo:
     try:
-        st.image("CLEAR_LOGO.png", width=100)  # Replace with the correct file name
+        st.image(load_logo(str(BASE_DIR / "CLEAR_LOGO.png")), width=100)  # Replace with the correct file name
     except FileNotFoundError:
         st.error("Logo image not found!")
 with col_title:
@@ -39,8 +163,9 @@ with col_title:
 st.sidebar.header("Navigation")
 selected_tab = st.sidebar.radio("Select a tab:", ["Environmental Analysis", "Financial Analysis", "Regulatory Compliance"])
 
-# Environmental Analysis Tab
-if selected_tab == "Environmental Analysis":
+# Environmental Analysis Tab (fragment: its widgets rerun only this body)
+@st.fragment
+def env_tab(data):
     st.header("🌿 Environmental Analysis")
 
     # Scenario Modeling Sliders
@@ -49,93 +174,59 @@ if selected_tab == "Environmental Analysis":
     energy_source = st.sidebar.selectbox("Energy Source", ["Renewable", "Non-renewable"], key="energy")
     export_ratio = st.sidebar.slider("Percent of Products Exported to EU", 0, 100, 20, key="export")
 
-    # Adjust emissions based on scenario inputs
-    adjusted_data = data.copy()
-    if transport_type == "Air":
-        adjusted_data["Logistics (kg CO2)"] *= 1.5
-    elif transport_type == "Sea":
-        adjusted_data["Logistics (kg CO2)"] *= 0.8
-
-    if energy_source == "Renewable":
-        adjusted_data["Production (kg CO2)"] *= 0.7
-    else:
-        adjusted_data["Production (kg CO2)"] *= 1.2
-
-    # Update Total Carbon Footprint
-    adjusted_data["Total Carbon Footprint (kg CO2)"] = (
-        adjusted_data["Raw Material (kg CO2)"] +
-        adjusted_data["Production (kg CO2)"] +
-        adjusted_data["Logistics (kg CO2)"]
-    )
+    # Adjust emissions based on scenario inputs (cached across reruns)
+    adjusted_data, pie_summary = compute_adjusted(data, transport_type, energy_source, data_token)
 
     # Display Adjusted Metrics
     st.subheader("Adjusted Emissions Data")
-    st.dataframe(adjusted_data[["Product Name", "Raw Material (kg CO2)", "Production (kg CO2)", "Logistics (kg CO2)", "Total Carbon Footprint (kg CO2)"]])
-
-    # Emissions Breakdown Pie Chart
-    st.subheader("Emissions Breakdown by Category")
-    pie_chart = px.pie(
-        adjusted_data.melt(id_vars="Product Name", value_vars=["Raw Material (kg CO2)", "Production (kg CO2)", "Logistics (kg CO2)"], var_name="Category", value_name="Emissions (kg CO2)"),
-        values="Emissions (kg CO2)",
-        names="Category",
-        title="Emissions Distribution",
-        color_discrete_sequence=px.colors.sequential.RdBu
-    )
-    st.plotly_chart(pie_chart, use_container_width=True)
-
-    # Bar Chart for Per-Product Emissions
-    st.subheader("Per-Product Emissions Comparison")
-    bar_chart = px.bar(
-        adjusted_data,
-        x="Product Name",
-        y="Total Carbon Footprint (kg CO2)",
-        title="Total Emissions by Product",
-        labels={"Product Name": "Product", "Total Carbon Footprint (kg CO2)": "Total Emissions (kg CO2)"},
-        color="Total Carbon Footprint (kg CO2)",
-        color_continuous_scale=px.colors.sequential.Blues
-    )
-    st.plotly_chart(bar_chart, use_container_width=True)
-
-# Financial Analysis Tab
-elif selected_tab == "Financial Analysis":
+    # compute_adjusted already returns exactly the display columns, in order
+    st.dataframe(adjusted_data)
+
+    # Emissions Breakdown and Per-Product Comparison (one figure, one render)
+    st.subheader("Emissions Breakdown and Per-Product Comparison")
+    pie_items = tuple(zip(pie_summary["Category"], pie_summary["Emissions (kg CO2)"]))
+    bar_items = tuple(zip(adjusted_data["Product Name"], adjusted_data["Total Carbon Footprint (kg CO2)"]))
+    st.plotly_chart(build_env_figure(pie_items, bar_items), use_container_width=True)
+
+# Financial Analysis Tab (fragment: the tax slider reruns only this body)
+@st.fragment
+def fin_tab(data):
     st.header("💰 Financial Analysis")
 
     # Carbon Tax Slider
     carbon_tax_rate = st.slider("Set Carbon Tax Rate (€/ton)", min_value=10, max_value=100, value=25, step=5)
 
-    # Calculate Total Carbon Emissions (tons)
-    data["Total Carbon Footprint (tons)"] = data["Total Carbon Footprint (kg CO2)"] / 1000
-    data["Carbon Tax (€)"] = data["Total Carbon Footprint (tons)"] * carbon_tax_rate
-
-    # Display Metrics
-    total_emissions = data["Total Carbon Footprint (tons)"].sum()
-    total_tax_cost = data["Carbon Tax (€)"].sum()
+    # Calculate Total Carbon Emissions (tons), cached per tax rate
+    financial_data, total_emissions, total_tax_cost = compute_financial(data, carbon_tax_rate, data_token)
 
     st.metric(label="Total Carbon Emissions (tons)", value=f"{total_emissions:.2f}")
     st.metric(label="Total Carbon Tax Cost (€)", value=f"€{total_tax_cost:.2f}")
 
     # Cost Breakdown Table
     st.subheader("Cost Breakdown by Product")
-    st.dataframe(data[["Product Name", "Total Carbon Footprint (tons)", "Carbon Tax (€)"]])
+    st.table(financial_data)
 
     # Bar Chart for Cost Distribution
     st.subheader("Cost Distribution by Product")
-    bar_chart = px.bar(
-        data,
-        x="Product Name",
-        y="Carbon Tax (€)",
-        title="Carbon Tax Costs by Product",
-        labels={"Product Name": "Product", "Carbon Tax (€)": "Tax Cost (€)"},
-        color="Carbon Tax (€)",
-        color_continuous_scale=px.colors.sequential.Blues
+    cost_items = tuple(zip(financial_data["Product Name"], financial_data["Carbon Tax (€)"]))
+    st.plotly_chart(
+        build_bar(cost_items, "Carbon Tax Costs by Product", "Product", "Tax Cost (€)"),
+        use_container_width=True
     )
-    st.plotly_chart(bar_chart, use_container_width=True)
 
 # Regulatory Compliance Tab
-elif selected_tab == "Regulatory Compliance":
+@st.fragment
+def reg_tab():
     st.header("📜 Regulatory Compliance Tools")
     st.write("This section will include compliance evaluation and rule enforcement tools.")
 
+if selected_tab == "Environmental Analysis":
+    env_tab(data)
+elif selected_tab == "Financial Analysis":
+    fin_tab(data)
+elif selected_tab == "Regulatory Compliance":
+    reg_tab()
+
 # Footer Attribution
 st.write("---")
 st.write("**CLEAR v1.0**")